@@ -2,8 +2,10 @@ import os
 import shutil
 import uuid
 import tempfile
+from sys import intern
 from copy import deepcopy
-from typing import Optional, List
+from contextlib import contextmanager
+from typing import Optional, List, Iterator
 
 from coqpyt.lsp.structs import (
     TextDocumentItem,
@@ -78,12 +80,15 @@ class CoqFile(object):
             self._handle_exception(e)
             raise e
 
+        self.__text = text
         self.steps_taken: int = 0
         self.__init_steps(text, ast)
         self.__validate()
         self.context = FileContext(self.path, module=self.file_module, coqtop=coqtop)
         self.version = 1
         self.workspace = workspace
+        # Changes delayed by an ongoing batch (see CoqFile.batch)
+        self._batch: Optional[List[CoqChange]] = None
 
     def __enter__(self):
         return self
@@ -109,10 +114,10 @@ class CoqFile(object):
         self._path = new_path
 
     def _handle_exception(self, e):
-        if not isinstance(e, ResponseError) or e.code not in [
-            ErrorCodes.ServerQuit.value,
-            ErrorCodes.ServerTimeout.value,
-        ]:
+        if not isinstance(e, ResponseError) or e.code not in (
+            ErrorCodes.ServerQuit,
+            ErrorCodes.ServerTimeout,
+        ):
             self.coq_lsp_client.shutdown()
             self.coq_lsp_client.exit()
         if self.__from_lib:
@@ -183,7 +188,9 @@ class CoqFile(object):
         lines[-1] = lines[-1][: curr_range.end.character]
         lines[0] = lines[0][start:]
 
-        return " ".join(" ".join(lines).split())
+        # Short texts such as "Proof." or "reflexivity." repeat across the file,
+        # so the steps (and the terms built from them) share a single copy
+        return intern(" ".join(" ".join(lines).split()))
 
     def __read(self):
         with open(self.path, "r") as f:
@@ -192,6 +199,7 @@ class CoqFile(object):
     def __refresh(self):
         uri = f"file://{self.path}"
         text = self.__read()
+        self.__text = text
         try:
             self.version += 1
             self.coq_lsp_client.didChange(
@@ -205,7 +213,7 @@ class CoqFile(object):
     def __update_steps(self):
         self.__refresh()
         uri = f"file://{self.path}"
-        text = self.__read()
+        text = self.__text
         try:
             ast = self.coq_lsp_client.get_document(TextDocumentIdentifier(uri)).spans
         except Exception as e:
@@ -230,7 +238,7 @@ class CoqFile(object):
         old_steps_taken = self.steps_taken
         old_diagnostics = self.coq_lsp_client.lsp_endpoint.diagnostics[uri]
         self.coq_lsp_client.lsp_endpoint.diagnostics[uri] = []
-        old_text = self.__read()
+        old_text = self.__text
 
         try:
             change_function(*args)
@@ -246,10 +254,41 @@ class CoqFile(object):
             self.coq_lsp_client.lsp_endpoint.diagnostics[uri] = old_diagnostics
             raise e
 
-    def __delete_step_text(self, step_index: int):
+    def _queue_changes(self, changes: List[CoqChange]) -> bool:
+        if self._batch is None:
+            return False
+        self._batch.extend(changes)
+        return True
+
+    def _flush_batch(self):
+        # Applies the changes queued so far, so that the steps are executed
+        # (or read) after them. The batch stays open for the next changes.
+        if not self._batch:
+            return
+        changes, self._batch = self._batch, None
+        try:
+            self.change_steps(changes)
+        finally:
+            self._batch = []
+
+    @staticmethod
+    def __split_lines(text: str) -> List[str]:
+        # Same as readlines, which (unlike splitlines) only breaks lines on "\n"
+        lines = [line + "\n" for line in text.split("\n")]
+        lines[-1] = lines[-1][:-1]
+        if lines[-1] == "":
+            lines.pop()
+        return lines
+
+    def __read_lines(self) -> List[str]:
         with open(self._path, "r") as f:
-            lines = f.readlines()
+            return f.readlines()
 
+    def __write_lines(self, lines: List[str]):
+        with open(self._path, "w") as f:
+            f.write("".join(lines))
+
+    def __delete_step_text(self, step_index: int, lines: List[str]):
         step = self.steps[step_index]
         if step_index != 0:
             prev_step_end = self.steps[step_index - 1].ast.range.end
@@ -262,24 +301,15 @@ class CoqFile(object):
         end_line = end_line[step.ast.range.end.character :]
         start_line = start_line[: prev_step_end.character]
 
-        if prev_step_end.line == step.ast.range.end.line:
-            lines[prev_step_end.line] = start_line + end_line
-        else:
-            lines[prev_step_end.line] = start_line
-            lines[step.ast.range.end.line] = end_line
-
-        # Delete lines between first and last line
-        for _ in range(step.ast.range.end.line - prev_step_end.line - 1):
-            del lines[prev_step_end.line + 1]
-        text = "".join(lines)
-
-        with open(self._path, "w") as f:
-            f.write(text)
-
-    def __add_step_text(self, previous_step_index: int, step_text: str):
-        with open(self._path, "r") as f:
-            lines = f.readlines()
+        # The lines from the first to the last one of the step are replaced
+        # by the line that joins what is left of them
+        lines[prev_step_end.line : step.ast.range.end.line + 1] = CoqFile.__split_lines(
+            start_line + end_line
+        )
 
+    def __add_step_text(
+        self, previous_step_index: int, step_text: str, lines: List[str]
+    ):
         previous_step = self.steps[previous_step_index]
         end_line = lines[previous_step.ast.range.end.line]
         end_line = (
@@ -287,12 +317,10 @@ class CoqFile(object):
             + step_text
             + end_line[previous_step.ast.range.end.character :]
         )
-        lines[previous_step.ast.range.end.line] = end_line
-
-        text = "".join(lines)
-
-        with open(self._path, "w") as f:
-            f.write(text)
+        # The step text may contain several lines, so the edited line is split
+        # to keep one line per element for the following changes
+        line = previous_step.ast.range.end.line
+        lines[line : line + 1] = CoqFile.__split_lines(end_line)
 
     def __delete_update_ast(self, step_index: int):
         deleted_step = self.steps[step_index]
@@ -364,7 +392,9 @@ class CoqFile(object):
     def _delete_step(self, step_index: int) -> None:
         deleted_step = self.steps[step_index]
         deleted_text = deleted_step.text
-        self.__delete_step_text(step_index)
+        lines = self.__read_lines()
+        self.__delete_step_text(step_index, lines)
+        self.__write_lines(lines)
 
         # Modify the previous steps instead of creating new ones
         # This is important to preserve their references
@@ -387,7 +417,9 @@ class CoqFile(object):
             CoqFile.exec(self, n_steps)
 
     def _add_step(self, previous_step_index: int, step_text: str) -> None:
-        self.__add_step_text(previous_step_index, step_text)
+        lines = self.__read_lines()
+        self.__add_step_text(previous_step_index, step_text, lines)
+        self.__write_lines(lines)
 
         # Modify the previous steps instead of creating new ones
         # This is important to preserve their references
@@ -429,30 +461,53 @@ class CoqFile(object):
 
         return offset
 
-    def __change_steps(self, changes: List[CoqChange]):
-        previous_steps_takens = self.steps_taken
-        offset_steps, offset_steps_taken = 0, self._get_steps_taken_offset(changes)
-        previous_steps_size = len(self.steps)
-        CoqFile.exec(self, -self.steps_taken)
+    def _apply_changes(self, changes: List[CoqChange]) -> int:
+        """Writes the changes to the file and updates the steps and their ranges.
+        The new text is not sent to coq-lsp, and the added steps are placeholders.
+
+        Args:
+            changes (List[CoqChange]): The changes to be applied, in order.
 
+        Returns:
+            int: The number of added steps minus the number of deleted steps.
+        """
+        offset_steps = 0
+        # The text is only read and written once for the whole batch
+        lines = self.__read_lines()
         for change in changes:
             if isinstance(change, CoqAdd):
-                self.__add_step_text(change.previous_step_index, change.step_text)
+                self.__add_step_text(
+                    change.previous_step_index, change.step_text, lines
+                )
                 step = self.__add_update_ast(
                     change.previous_step_index, change.step_text
                 )
                 self.steps.insert(change.previous_step_index + 1, step)
-                self.__index_tracker.insert(change.previous_step_index + 1, None)
                 offset_steps += 1
             elif isinstance(change, CoqDelete):
-                self.__delete_step_text(change.step_index)
+                self.__delete_step_text(change.step_index, lines)
                 self.__delete_update_ast(change.step_index)
                 self.steps.pop(change.step_index)
-                self.__index_tracker.pop(change.step_index)
                 offset_steps -= 1
             else:
                 raise NotImplementedError(f"Unknown change: {change}")
 
+        self.__write_lines(lines)
+        return offset_steps
+
+    def __change_steps(self, changes: List[CoqChange]):
+        previous_steps_takens = self.steps_taken
+        offset_steps_taken = self._get_steps_taken_offset(changes)
+        previous_steps_size = len(self.steps)
+        CoqFile.exec(self, -self.steps_taken)
+
+        offset_steps = self._apply_changes(changes)
+        for change in changes:
+            if isinstance(change, CoqAdd):
+                self.__index_tracker.insert(change.previous_step_index + 1, None)
+            else:
+                self.__index_tracker.pop(change.step_index)
+
         self.__update_steps()
         # NOTE: We check the expected offset, because a given step text might contain
         # two steps or something that might lead to similar unwanted behaviour.
@@ -479,6 +534,14 @@ class CoqFile(object):
         """
         return self.steps[self.steps_taken - 1]
 
+    @property
+    def text(self) -> str:
+        """
+        Returns:
+            str: The text of the file, as last sent to coq-lsp.
+        """
+        return self.__text
+
     @property
     def timeout(self) -> int:
         """The timeout of the coq-lsp client.
@@ -524,6 +587,7 @@ class CoqFile(object):
         Returns:
             List[Step]: List of steps executed.
         """
+        self._flush_batch()
         sign = 1 if nsteps > 0 else -1
         initial_steps_taken = self.steps_taken
         nsteps = min(
@@ -556,6 +620,8 @@ class CoqFile(object):
             InvalidFileException: If the file being changed is not valid.
             InvalidDeleteException: If the file is invalid after deleting the step.
         """
+        if self._queue_changes([CoqDelete(step_index)]):
+            return
         self._make_change(self._delete_step, step_index)
 
     def add_step(
@@ -574,6 +640,8 @@ class CoqFile(object):
             InvalidFileException: If the file being changed is not valid.
             InvalidAddException: If the file is invalid after adding the step.
         """
+        if self._queue_changes([CoqAdd(step_text, previous_step_index)]):
+            return
         self._make_change(self._add_step, previous_step_index, step_text)
 
     def change_steps(self, changes: List[CoqChange]):
@@ -588,8 +656,40 @@ class CoqFile(object):
             InvalidChangeException: If the file is invalid after applying the changes.
             NotImplementedError: If the changes contain a CoqChange that is not a CoqAdd or CoqDelete.
         """
+        if self._queue_changes(changes):
+            return
         self._make_change(self.__change_steps, changes)
 
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Groups the calls to add_step, delete_step and change_steps made inside
+        the block into a single call to change_steps, applied when the block
+        exits. The file is only checked once for the whole group.
+        Indices refer to the file after the previous changes of the block,
+        and the steps (or proofs) are only updated when the block exits.
+        Calls to exec and run (and, in a ProofFile, reading the proofs or the
+        current goals) first apply the changes queued so far, so they never
+        see steps that were already deleted.
+        If an exception is raised inside the block, the changes that were not
+        applied yet are discarded.
+
+        Raises:
+            InvalidFileException: If the file being changed is not valid.
+            InvalidChangeException: If the file is invalid after applying the changes.
+        """
+        if self._batch is not None:
+            # Nested batches are merged with the outer one
+            yield
+            return
+
+        self._batch = []
+        try:
+            yield
+        finally:
+            changes, self._batch = self._batch, None
+        if len(changes) > 0:
+            self.change_steps(changes)
+
     def save_vo(self):
         """Compiles the vo file for this Coq file."""
         uri = f"file://{self._path}"
@@ -6,6 +6,9 @@ from typing import Optional, List, Dict, Tuple, Union
 from coqpyt.coq.exceptions import NotationNotFoundException
 from coqpyt.coq.structs import SegmentType, SegmentStack, Step, TermType, Term
 
+# Types of the AST nodes that can contain other nodes
+_CONTAINERS = (dict, list)
+
 
 class FileContext:
     def __init__(
@@ -266,10 +269,12 @@ class FileContext:
         inductive = expr[0] == "VernacInductive"
         extend = expr[0] == "VernacExtend"
         stack, res = expr[:0:-1], []
+        # The AST is decoded JSON, so its nodes are exactly dicts, lists or
+        # scalars and can be dispatched on their type without isinstance
         while len(stack) > 0:
             el = stack.pop()
             v = FileContext.__get_v(el)
-            if v is not None and isinstance(v, list) and len(v) == 2:
+            if type(v) is list and len(v) == 2:
                 id = FileContext.get_id(v)
                 if id is not None:
                     if not inductive:
@@ -280,11 +285,9 @@ class FileContext:
                         return [v[1][1]]
                     res.append(v[1][1])
 
-            elif isinstance(el, dict):
-                for v in reversed(el.values()):
-                    if isinstance(v, (dict, list)):
-                        stack.append(v)
-            elif isinstance(el, list):
+            elif type(el) is dict:
+                stack.extend(v for v in reversed(el.values()) if type(v) in _CONTAINERS)
+            elif type(el) is list:
                 if len(el) > 0 and el[0] == "CLocalAssum":
                     continue
 
@@ -292,9 +295,7 @@ class FileContext:
                 if ident is not None and extend:
                     return [ident]
 
-                for v in reversed(el):
-                    if isinstance(v, (dict, list)):
-                        stack.append(v)
+                stack.extend(v for v in reversed(el) if type(v) in _CONTAINERS)
         return res
 
     @staticmethod
@@ -335,9 +336,9 @@ class FileContext:
 
     @staticmethod
     def __get_v(el: List) -> Optional[str]:
-        if isinstance(el, dict) and "v" in el:
-            return el["v"]
-        elif isinstance(el, list) and len(el) == 2 and el[0] == "v":
+        if type(el) is dict:
+            return el.get("v")
+        elif type(el) is list and len(el) == 2 and el[0] == "v":
             return el[1]
         return None
 
@@ -544,11 +545,11 @@ class FileContext:
             "VernacBeginSection",
         ]
 
-    def update(self, context: Union["FileContext", Dict[str, Term]] = {}):
+    def update(self, context: Union["FileContext", Dict[str, Term]]):
         """Updates the context with new terms.
 
         Args:
-            terms (Dict[str, Term]): The new terms to be added.
+            context (Union[FileContext, Dict[str, Term]]): The new terms to be added.
         """
         if isinstance(context, FileContext):
             terms = context.terms
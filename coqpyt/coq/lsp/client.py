@@ -32,7 +32,7 @@ class CoqLspClient(LspClient):
         memory_limit: int = 2097152,
         coq_lsp: str = "coq-lsp",
         coq_lsp_options: str = "-D 0",
-        init_options: Dict = __DEFAULT_INIT_OPTIONS,
+        init_options: Optional[Dict] = None,
     ):
         """Creates a CoqLspClient
 
@@ -61,6 +61,9 @@ class CoqLspClient(LspClient):
                         Defaults to 1.
         """
         self.file_progress: Dict[str, List[CoqFileProgressParams]] = {}
+        # Goals already requested for each open document, indexed by position.
+        # They are discarded whenever a new version of the document is sent.
+        self.__goals: Dict[str, Dict[Tuple[int, int], GoalAnswer]] = {}
 
         if sys.platform.startswith("linux"):
             command = f"ulimit -v {memory_limit}; {coq_lsp} {coq_lsp_options}"
@@ -81,6 +84,11 @@ class CoqLspClient(LspClient):
         }
         super().__init__(lsp_endpoint)
         workspaces = [{"name": "coq-lsp", "uri": root_uri}]
+        if init_options is None:
+            init_options = CoqLspClient.__DEFAULT_INIT_OPTIONS
+        # We copy the options so that neither the caller's dict nor the
+        # defaults are changed below
+        init_options = dict(init_options)
         # This is required to be False since we use it to know if operations
         # such as didOpen and didChange already finished.
         init_options["eager_diagnostics"] = False
@@ -125,6 +133,7 @@ class CoqLspClient(LspClient):
             textDocument (TextDocumentItem): Text document to open
         """
         self.lsp_endpoint.diagnostics[textDocument.uri] = []
+        self.__goals.pop(textDocument.uri, None)
         super().didOpen(textDocument)
         self.__wait_for_operation()
 
@@ -140,6 +149,7 @@ class CoqLspClient(LspClient):
             contentChanges (list[TextDocumentContentChangeEvent]): Changes made.
         """
         self.lsp_endpoint.diagnostics[textDocument.uri] = []
+        self.__goals.pop(textDocument.uri, None)
         super().didChange(textDocument, contentChanges)
         self.__wait_for_operation()
 
@@ -147,6 +157,7 @@ class CoqLspClient(LspClient):
         self, textDocument: TextDocumentIdentifier, position: Position
     ) -> Optional[GoalAnswer]:
         """Get proof goals and relevant information at a position.
+        The answer is reused for the same position until the document changes.
 
         Args:
             textDocument (TextDocumentIdentifier): Text document to consider.
@@ -156,10 +167,14 @@ class CoqLspClient(LspClient):
             GoalAnswer: Contains the goals at a position, messages associated
                 to the position and if errors exist, the top error at the position.
         """
-        result_dict = self.lsp_endpoint.call_method(
-            "proof/goals", textDocument=textDocument, position=position
-        )
-        return GoalAnswer.parse(result_dict)
+        goals = self.__goals.setdefault(textDocument.uri, {})
+        key = (position.line, position.character)
+        if key not in goals:
+            result_dict = self.lsp_endpoint.call_method(
+                "proof/goals", textDocument=textDocument, position=position
+            )
+            goals[key] = GoalAnswer.parse(result_dict)
+        return goals[key]
 
     def get_document(
         self, textDocument: TextDocumentIdentifier
@@ -1,34 +1,68 @@
-from enum import Enum
-from typing import Any, Optional, Tuple, List, Dict
+from sys import intern
+from functools import lru_cache
+from enum import IntEnum
+from dataclasses import dataclass, field
+from typing import Any, Optional, Tuple, List, Dict, NamedTuple
 
 from coqpyt.lsp.structs import Range, VersionedTextDocumentIdentifier, Position
 
 
-class Hyp(object):
-    def __init__(self, names: List[str], ty: str, definition: Optional[str] = None):
-        self.names = names
-        self.ty = ty
-        self.definition = definition
+def _intern(text: Any) -> Any:
+    # Names and types repeat across the goals of a proof, so we keep a single
+    # copy of each. They may not be strings depending on the pp_type option.
+    return intern(text) if isinstance(text, str) else text
+
+
+def _parse_position(position: Dict) -> Position:
+    return Position(position["line"], position["character"], position.get("offset", 0))
+
+
+def _parse_range(range: Dict) -> Range:
+    # Built positionally, which avoids unpacking the dicts as keyword arguments
+    return Range(_parse_position(range["start"]), _parse_position(range["end"]))
+
+
+class Hyp(NamedTuple):
+    # A tuple, since the same Hyp may be shared by several goals
+    names: Tuple[str, ...]
+    ty: str
+    definition: Optional[str] = None
 
     def __repr__(self) -> str:
         return ", ".join(self.names) + f": {self.ty}"
 
 
-class Goal(object):
-    def __init__(self, hyps: List[Hyp], ty: str):
-        self.hyps = hyps
-        self.ty = ty
+@lru_cache(maxsize=4096)
+def _make_hyp(names: Tuple[str, ...], ty: Any, definition: Any) -> Hyp:
+    return Hyp(tuple(map(_intern, names)), _intern(ty), definition)
+
+
+def _parse_hyp(hyp: Dict) -> Hyp:
+    # The same hypotheses show up in the goals of consecutive steps of a proof,
+    # so equal hypotheses are parsed once and the Hyp is shared between goals.
+    names, ty, definition = tuple(hyp["names"]), hyp["ty"], hyp.get("def")
+    try:
+        return _make_hyp(names, ty, definition)
+    except TypeError:
+        # Terms are not hashable when they are not printed to strings
+        return Hyp(tuple(map(_intern, names)), _intern(ty), definition)
+
+
+# The dataclasses in this module compare by value instead of by identity,
+# so they are not hashable.
+@dataclass(slots=True)
+class Goal:
+    hyps: List[Hyp]
+    ty: str
 
     @staticmethod
     def parse(goal: Dict) -> Optional["Goal"]:
-        if "hyps" not in goal:
+        hyps = goal.get("hyps")
+        if hyps is None:
             return None
-        for hyp in goal["hyps"]:
-            if "def" in hyp:
-                hyp["definition"] = hyp["def"]
-                hyp.pop("def")
-        hyps = [Hyp(**hyp) for hyp in goal["hyps"]]
-        ty = None if "ty" not in goal else goal["ty"]
+        # The JSON is read without being changed, so that it can be reused
+        hyps = [_parse_hyp(hyp) for hyp in hyps]
+        ty = _intern(goal.get("ty"))
         return Goal(hyps, ty)
 
     def __repr__(self) -> str:
@@ -39,20 +73,13 @@ class Goal(object):
             return self.ty
 
 
-class GoalConfig(object):
-    def __init__(
-        self,
-        goals: List[Goal],
-        stack: List[Tuple[List[Goal], List[Goal]]],
-        shelf: List[Goal],
-        given_up: List[Goal],
-        bullet: Any = None,
-    ):
-        self.goals = goals
-        self.stack = stack
-        self.shelf = shelf
-        self.given_up = given_up
-        self.bullet = bullet
+@dataclass(slots=True)
+class GoalConfig:
+    goals: List[Goal]
+    stack: List[Tuple[List[Goal], List[Goal]]]
+    shelf: List[Goal]
+    given_up: List[Goal]
+    bullet: Any = None
 
     def __repr__(self) -> str:
         bold = lambda text: "\033[1m\033[93m" + text + "\033[0m"
@@ -84,38 +111,43 @@ class GoalConfig(object):
 
     @staticmethod
     def parse(goal_config: Dict) -> Optional["GoalConfig"]:
-        parse_goals = lambda goals: [Goal.parse(goal) for goal in goals]
-        goals = parse_goals(goal_config["goals"])
-        stack = [(parse_goals(t[0]), parse_goals(t[1])) for t in goal_config["stack"]]
-        bullet = None if "bullet" not in goal_config else goal_config["bullet"]
-        shelf = parse_goals(goal_config["shelf"])
-        given_up = parse_goals(goal_config["given_up"])
+        parse_goal = Goal.parse
+        goals = [parse_goal(goal) for goal in goal_config["goals"]]
+        stack = [
+            ([parse_goal(goal) for goal in left], [parse_goal(goal) for goal in right])
+            for left, right in goal_config["stack"]
+        ]
+        shelf = [parse_goal(goal) for goal in goal_config["shelf"]]
+        given_up = [parse_goal(goal) for goal in goal_config["given_up"]]
+        bullet = goal_config.get("bullet")
         return GoalConfig(goals, stack, shelf, given_up, bullet=bullet)
 
 
-class Message(object):
-    def __init__(self, level, text, range=None):
-        self.level = level
-        self.text = text
-        self.range = range
-
-
-class GoalAnswer(object):
-    def __init__(
-        self,
-        textDocument: VersionedTextDocumentIdentifier,
-        position: Position,
-        messages: List[Message],
-        goals: Optional[GoalConfig] = None,
-        error: Any = None,
-        program: List = [],
-    ):
-        self.textDocument = textDocument
-        self.position = position
-        self.messages = messages
-        self.goals = goals
-        self.error = error
-        self.program = program
+@dataclass(slots=True)
+class Message:
+    level: Any
+    text: str
+    range: Optional[Range] = None
+
+    @staticmethod
+    def parse(message: Dict) -> "Message":
+        range = message.get("range")
+        return Message(
+            message["level"],
+            message["text"],
+            None if not range else _parse_range(range),
+        )
+
+
+@dataclass(slots=True)
+class GoalAnswer:
+    # The answers for a position are equal across versions of the document
+    textDocument: VersionedTextDocumentIdentifier = field(compare=False)
+    position: Position
+    messages: List[Message]
+    goals: Optional[GoalConfig] = None
+    error: Any = None
+    program: List = field(default_factory=list)
 
     def __repr__(self):
         res = "\n"
@@ -135,112 +167,103 @@ class GoalAnswer(object):
 
     @staticmethod
     def parse(goal_answer) -> Optional["GoalAnswer"]:
-        goal_answer["textDocument"] = VersionedTextDocumentIdentifier(
-            **goal_answer["textDocument"]
+        text_document = goal_answer["textDocument"]
+        text_document = VersionedTextDocumentIdentifier(
+            text_document["uri"], text_document["version"]
         )
-        goal_answer["position"] = Position(
+        position = Position(
             goal_answer["position"]["line"], goal_answer["position"]["character"]
         )
 
-        if "goals" in goal_answer:
-            goal_answer["goals"] = GoalConfig.parse(goal_answer["goals"])
-
-        for i, message in enumerate(goal_answer["messages"]):
-            if not isinstance(message, str):
-                if message["range"]:
-                    message["range"] = Range(**message["range"])
-                goal_answer["messages"][i] = Message(**message)
-
-        return GoalAnswer(**goal_answer)
+        goals = goal_answer.get("goals")
+        if goals is not None:
+            goals = GoalConfig.parse(goals)
+
+        messages = [
+            message if isinstance(message, str) else Message.parse(message)
+            for message in goal_answer["messages"]
+        ]
+
+        return GoalAnswer(
+            text_document,
+            position,
+            messages,
+            goals,
+            goal_answer.get("error"),
+            goal_answer.get("program", []),
+        )
 
 
-class Result(object):
-    def __init__(self, range, message):
-        self.range = range
-        self.message = message
+class Result(NamedTuple):
+    range: Range
+    message: str
 
 
-class Query(object):
-    def __init__(self, query, results):
-        self.query = query
-        self.results = results
+class Query(NamedTuple):
+    query: str
+    results: List[Result]
 
 
-class RangedSpan(object):
-    def __init__(self, range: Range, span: Any):
-        self.range = range
-        self.span = span
+class RangedSpan(NamedTuple):
+    range: Range
+    span: Any
 
 
-class CompletionStatus(object):
-    def __init__(self, status: str, range: Range):
-        self.status = status
-        self.range = range
+class CompletionStatus(NamedTuple):
+    status: str
+    range: Range
 
 
-class FlecheDocument(object):
-    def __init__(self, spans: List[RangedSpan], completed: CompletionStatus):
-        self.spans = spans
-        self.completed = completed
+@dataclass(slots=True)
+class FlecheDocument:
+    spans: List[RangedSpan]
+    completed: CompletionStatus
 
     @staticmethod
     def parse(fleche_document: Dict) -> Optional["FlecheDocument"]:
-        if "spans" not in fleche_document or "completed" not in fleche_document:
+        spans = fleche_document.get("spans")
+        completed = fleche_document.get("completed")
+        if spans is None or completed is None:
             return None
-        spans: List[RangedSpan] = []
-        for span in fleche_document["spans"]:
-            range = Range(**span["range"])
-            spans.append(
-                RangedSpan(range, None if "span" not in span else span["span"])
-            )
+        spans = [
+            RangedSpan(_parse_range(span["range"]), span.get("span")) for span in spans
+        ]
         completion_status = CompletionStatus(
-            fleche_document["completed"]["status"],
-            Range(**fleche_document["completed"]["range"]),
+            intern(completed["status"]), _parse_range(completed["range"])
         )
         return FlecheDocument(spans, completion_status)
 
 
-class CoqFileProgressKind(Enum):
+class CoqFileProgressKind(IntEnum):
     Processing = 1
     FatalError = 2
 
 
-class CoqFileProgressProcessingInfo(object):
-    def __init__(self, range: Range, kind: Optional[CoqFileProgressKind]):
-        self.range = range
-        self.kind = kind
+class CoqFileProgressProcessingInfo(NamedTuple):
+    range: Range
+    kind: Optional[CoqFileProgressKind]
 
 
-class CoqFileProgressParams(object):
-    def __init__(
-        self,
-        textDocument: VersionedTextDocumentIdentifier,
-        processing: List[CoqFileProgressProcessingInfo],
-    ):
-        self.textDocument = textDocument
-        self.processing = processing
+@dataclass(slots=True)
+class CoqFileProgressParams:
+    textDocument: VersionedTextDocumentIdentifier
+    processing: List[CoqFileProgressProcessingInfo]
 
     @staticmethod
     def parse(coqFileProgressParams: Dict) -> Optional["CoqFileProgressParams"]:
-        if (
-            "textDocument" not in coqFileProgressParams
-            or "processing" not in coqFileProgressParams
-        ):
+        textDocument = coqFileProgressParams.get("textDocument")
+        processing = coqFileProgressParams.get("processing")
+        if textDocument is None or processing is None:
             return None
         textDocument = VersionedTextDocumentIdentifier(
-            coqFileProgressParams["textDocument"]["uri"],
-            coqFileProgressParams["textDocument"]["version"],
+            textDocument["uri"], textDocument["version"]
         )
-        processing = []
-        for progress in coqFileProgressParams["processing"]:
-            processing.append(
-                CoqFileProgressProcessingInfo(
-                    Range(**progress["range"]),
-                    (
-                        None
-                        if "kind" not in progress
-                        else CoqFileProgressKind(progress["kind"])
-                    ),
-                )
+        # Same lookup done by CoqFileProgressKind(value), without the call overhead
+        kinds = CoqFileProgressKind._value2member_map_
+        processing = [
+            CoqFileProgressProcessingInfo(
+                _parse_range(progress["range"]), kinds.get(progress.get("kind"))
             )
+            for progress in processing
+        ]
         return CoqFileProgressParams(textDocument, processing)
@@ -26,7 +26,8 @@ from coqpyt.coq.base_file import CoqFile
 
 
 class _AuxFile(object):
-    CACHE_NAME = "coqpyt_cache"
+    # Renamed whenever the pickled terms change their layout
+    CACHE_NAME = "coqpyt_cache_v2"
 
     def __init__(
         self,
@@ -65,10 +66,10 @@ class _AuxFile(object):
         self.version = 1
 
     def _handle_exception(self, e):
-        if not isinstance(e, ResponseError) or e.code not in [
-            ErrorCodes.ServerQuit.value,
-            ErrorCodes.ServerTimeout.value,
-        ]:
+        if not isinstance(e, ResponseError) or e.code not in (
+            ErrorCodes.ServerQuit,
+            ErrorCodes.ServerTimeout,
+        ):
             self.coq_lsp_client.shutdown()
             self.coq_lsp_client.exit()
         os.remove(self.path)
@@ -749,10 +750,10 @@ class ProofFile(CoqFile):
                 adds.append(i)
         # Get Delete indices in initial steps
         # Ignore deletions after the pointer
+        deleted_ids = set(map(id, deleted_steps))
         for i, step in enumerate(self.steps[: self.steps_taken]):
-            for step in deleted_steps:
-                if self.steps[i].ast.range == step.ast.range:
-                    deletes.append(i)
+            if id(step) in deleted_ids:
+                deletes.append(i)
         return adds, deletes, new_steps_taken
 
     def __goals(self, end_pos: Position):
@@ -813,6 +814,7 @@ class ProofFile(CoqFile):
                 order they are closed on the file. The steps include the
                 context used for each step and the goals in that step.
         """
+        self._flush_batch()
         return self.__proofs
 
     @property
@@ -825,6 +827,7 @@ class ProofFile(CoqFile):
                 order they are opened on the file. The steps include the
                 context used for each step and the goals in that step.
         """
+        self._flush_batch()
         return self.__open_proofs
 
     @property
@@ -849,6 +852,7 @@ class ProofFile(CoqFile):
         Returns:
             Optional[GoalAnswer]: Goals in the current position if there are goals.
         """
+        self._flush_batch()
         if self.steps_taken == len(self.steps):
             end_pos = self.prev_step.ast.range.end
         else:
@@ -877,6 +881,7 @@ class ProofFile(CoqFile):
         return self.__can_close_proof(self.current_goals)
 
     def exec(self, nsteps=1) -> List[Step]:
+        self._flush_batch()
         sign = 1 if nsteps > 0 else -1
         initial_steps_taken = self.steps_taken
         nsteps = min(
@@ -959,6 +964,8 @@ class ProofFile(CoqFile):
         self.change_steps(changes)
 
     def add_step(self, previous_step_index: int, step_text: str):
+        if self._queue_changes([CoqAdd(step_text, previous_step_index)]):
+            return
         # We need to calculate this here because the _add_step
         # will possibly change the steps_taken
         processed = self.steps_taken > previous_step_index + 1
@@ -972,6 +979,8 @@ class ProofFile(CoqFile):
             self.__local_exec(n_steps)  # Execute until starting point
 
     def delete_step(self, step_index: int) -> None:
+        if self._queue_changes([CoqDelete(step_index)]):
+            return
         deleted = self.steps[step_index]  # Get step before deletion
         # We need to calculate this here because the _delete_step
         # will possibly change the steps_taken
@@ -981,6 +990,8 @@ class ProofFile(CoqFile):
             self.__delete_step(deleted)
 
     def change_steps(self, changes: List[CoqChange]):
+        if self._queue_changes(changes):
+            return
         adds, deletes, new_steps_taken = self.__get_changes_data(changes)
         old_steps_taken = self.steps_taken
 
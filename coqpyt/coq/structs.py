@@ -41,6 +41,8 @@ class TermType(Enum):
 
 
 class SegmentStack:
+    __slots__ = ("modules", "module_types", "sections", "stack", "__current")
+
     def __init__(self):
         self.modules: List[str] = []
         self.module_types: List[str] = []
@@ -75,7 +77,9 @@ class SegmentStack:
         self.__current -= 1
 
 
-class Step(object):
+class Step:
+    __slots__ = ("text", "short_text", "ast", "diagnostics")
+
     def __init__(self, text: str, short_text: str, ast: RangedSpan):
         self.text = text
         self.short_text = short_text
@@ -87,6 +91,8 @@ class Step(object):
 
 
 class Term:
+    __slots__ = ("step", "type", "file_path", "module")
+
     def __init__(
         self,
         step: Step,
@@ -129,6 +135,8 @@ class Term:
 
 
 class ProofStep:
+    __slots__ = ("step", "_goals", "context")
+
     def __init__(
         self,
         step: Step,
@@ -166,6 +174,8 @@ class ProofStep:
 
 
 class ProofTerm(Term):
+    __slots__ = ("steps", "context", "program")
+
     def __init__(
         self,
         term: Term,
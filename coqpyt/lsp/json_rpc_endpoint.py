@@ -19,7 +19,10 @@ class MyEncoder(json.JSONEncoder):
     """
 
     def default(self, o):  # pylint: disable=E0202
-        return o.__dict__
+        if hasattr(o, "__dict__"):
+            return o.__dict__
+        # Objects that declare __slots__ have no __dict__
+        return {slot: getattr(o, slot) for slot in o.__slots__}
 
 
 class JsonRpcEndpoint(object):
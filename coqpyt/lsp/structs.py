@@ -15,6 +15,8 @@ def to_type(o, new_type):
 
 
 class Position(object):
+    __slots__ = ("line", "character", "offset")
+
     def __init__(self, line, character, offset=0):
         """
         Constructs a new Position instance.
@@ -56,6 +58,8 @@ class Position(object):
 
 
 class Range(object):
+    __slots__ = ("start", "end")
+
     def __init__(self, start, end):
         """
         Constructs a new Range instance.
@@ -70,8 +74,9 @@ class Range(object):
         return str({"start": repr(self.start), "end": repr(self.end)})
 
     def __eq__(self, __value: object) -> bool:
+        # Equality with other types is False (e.g. a Message without a range)
         if not isinstance(__value, Range):
-            raise TypeError(f"Invalid type for comparison: {type(__value).__name__}")
+            return NotImplemented
         return self.start == __value.start and self.end == __value.end
 
     def __gt__(self, __value: object) -> bool:
@@ -639,7 +644,7 @@ class CompletionList(object):
         self.items = [to_type(i, CompletionItem) for i in items]
 
 
-class ErrorCodes(enum.Enum):
+class ErrorCodes(enum.IntEnum):
     # Defined by JSON RPC
     ParseError = -32700
     InvalidRequest = -32600
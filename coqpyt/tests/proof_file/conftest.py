@@ -0,0 +1,14 @@
+import shutil
+import pytest
+
+# The helpers in utility.py assert on whole structures, so they need pytest's
+# assertion rewriting to show where a comparison fails
+pytest.register_assert_rewrite("utility")
+
+# Every test in this directory opens its files with coq-lsp
+_HAS_COQ_LSP = shutil.which("coq-lsp") is not None
+
+
+def pytest_runtest_setup(item):
+    if not _HAS_COQ_LSP:
+        pytest.skip("coq-lsp is not installed")
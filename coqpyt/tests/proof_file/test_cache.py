@@ -22,8 +22,8 @@ class TestCache:
 
     def test_cache(self):
         with ProofFile(
-            "tests/resources/test_imports/test_import.v",
-            workspace="tests/resources/test_import",
+            str(RESOURCES / "test_imports" / "test_import.v"),
+            workspace=str(RESOURCES / "test_import"),
             use_disk_cache=False,
         ) as pf:
             pf.run()
@@ -31,8 +31,8 @@ class TestCache:
             no_cache_libs = pf.context.libraries.copy()
 
         with ProofFile(
-            "tests/resources/test_imports/test_import.v",
-            workspace="tests/resources/test_import",
+            str(RESOURCES / "test_imports" / "test_import.v"),
+            workspace=str(RESOURCES / "test_import"),
             use_disk_cache=True,
         ) as pf:
             pf.run()
@@ -40,8 +40,8 @@ class TestCache:
             cache1_libs = pf.context.libraries.copy()
 
         with ProofFile(
-            "tests/resources/test_imports/test_import.v",
-            workspace="tests/resources/test_import",
+            str(RESOURCES / "test_imports" / "test_import.v"),
+            workspace=str(RESOURCES / "test_import"),
             use_disk_cache=True,
         ) as pf:
             pf.run()
@@ -49,8 +49,8 @@ class TestCache:
             cache2_libs = pf.context.libraries.copy()
 
         with ProofFile(
-            "tests/resources/test_imports_copy/test_import.v",
-            workspace="tests/resources/test_import_copy/",
+            str(RESOURCES / "test_imports_copy" / "test_import.v"),
+            workspace=str(RESOURCES / "test_import_copy"),
             use_disk_cache=True,
         ) as pf:
             pf.run()
@@ -58,8 +58,8 @@ class TestCache:
             cache3_libs = pf.context.libraries.copy()
 
         with ProofFile(
-            "tests/resources/test_imports_copy/test_import.v",
-            workspace="tests/resources/test_import_copy/",
+            str(RESOURCES / "test_imports_copy" / "test_import.v"),
+            workspace=str(RESOURCES / "test_import_copy"),
             use_disk_cache=True,
         ) as pf:
             pf.run()
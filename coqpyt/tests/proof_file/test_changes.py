@@ -7,6 +7,26 @@ from coqpyt.coq.changes import *
 from utility import *
 
 
+def print_minus_step():
+    step = {
+        "text": "\n      Print minus.",
+        "goals": {
+            "goals": {
+                "goals": [{"hyps": [{"names": ["n"], "ty": "nat"}], "ty": "0 + n = n"}]
+            },
+            "position": {"line": 12, "character": 6},
+        },
+        "context": [
+            {
+                "text": "Notation minus := Nat.sub (only parsing).",
+                "type": "NOTATION",
+            }
+        ],
+    }
+    add_step_defaults(step)
+    return step
+
+
 class TestProofValidFile(SetupProofFile):
     def setup_method(self, method):
         self.setup("test_valid.v")
@@ -15,44 +35,24 @@ class TestProofValidFile(SetupProofFile):
         proof_file = self.proof_file
         proof_file.delete_step(6)
 
-        test_proofs = get_test_proofs("tests/proof_file/expected/valid_file.yml")
-        test_proofs["proofs"][0]["steps"].pop(1)
-        for i, step in enumerate(test_proofs["proofs"][0]["steps"]):
-            if i != 0:
-                step["goals"]["position"]["line"] -= 1
-            if i != len(test_proofs["proofs"][0]["steps"]) - 1:
-                step["goals"]["goals"]["goals"][0]["hyps"] = []
-                step["goals"]["goals"]["goals"][0]["ty"] = "∀ n : nat, 0 + n = n"
+        test_proofs = get_test_proofs("valid_file.yml")
+        steps = test_proofs["proofs"][0]["steps"]
+        steps.pop(1)
+        shift_lines(steps[1:], -1)
+        for step in steps[:-1]:
+            step["goals"]["goals"]["goals"][0]["hyps"] = []
+            step["goals"]["goals"]["goals"][0]["ty"] = "∀ n : nat, 0 + n = n"
         check_proof(test_proofs["proofs"][0], proof_file.proofs[0])
 
         proof_file.add_step(5, "\n      intros n.")
 
-        test_proofs = get_test_proofs("tests/proof_file/expected/valid_file.yml")
+        test_proofs = get_test_proofs("valid_file.yml")
         check_proof(test_proofs["proofs"][0], proof_file.proofs[0])
 
         # Check if context is changed correctly
         proof_file.add_step(7, "\n      Print minus.")
-        step = {
-            "text": "\n      Print minus.",
-            "goals": {
-                "goals": {
-                    "goals": [
-                        {"hyps": [{"names": ["n"], "ty": "nat"}], "ty": "0 + n = n"}
-                    ]
-                },
-                "position": {"line": 12, "character": 6},
-            },
-            "context": [
-                {
-                    "text": "Notation minus := Nat.sub (only parsing).",
-                    "type": "NOTATION",
-                }
-            ],
-        }
-        add_step_defaults(step)
-        test_proofs["proofs"][0]["steps"].insert(3, step)
-        for i, step in enumerate(test_proofs["proofs"][0]["steps"][4:]):
-            step["goals"]["position"]["line"] += 1
+        test_proofs["proofs"][0]["steps"].insert(3, print_minus_step())
+        shift_lines(test_proofs["proofs"][0]["steps"][4:], 1)
         check_proof(test_proofs["proofs"][0], proof_file.proofs[0])
 
         # Add step in beginning of proof
@@ -93,28 +93,9 @@ class TestProofValidFile(SetupProofFile):
             ]
         )
 
-        test_proofs = get_test_proofs("tests/proof_file/expected/valid_file.yml")
-        step = {
-            "text": "\n      Print minus.",
-            "goals": {
-                "goals": {
-                    "goals": [
-                        {"hyps": [{"names": ["n"], "ty": "nat"}], "ty": "0 + n = n"}
-                    ]
-                },
-                "position": {"line": 12, "character": 6},
-            },
-            "context": [
-                {
-                    "text": "Notation minus := Nat.sub (only parsing).",
-                    "type": "NOTATION",
-                }
-            ],
-        }
-        add_step_defaults(step)
-        test_proofs["proofs"][0]["steps"].insert(3, step)
-        for step in test_proofs["proofs"][0]["steps"][4:]:
-            step["goals"]["position"]["line"] += 1
+        test_proofs = get_test_proofs("valid_file.yml")
+        test_proofs["proofs"][0]["steps"].insert(3, print_minus_step())
+        shift_lines(test_proofs["proofs"][0]["steps"][4:], 1)
         check_proof(test_proofs["proofs"][0], proof_file.proofs[0])
 
         # Add step in beginning of proof
@@ -155,6 +136,52 @@ class TestProofValidFile(SetupProofFile):
         assert self.proof_file.steps_taken == steps_taken - 7
         assert len(self.proof_file.proofs) == proofs - 1
 
+    def test_batch(self):
+        steps_taken = self.proof_file.steps_taken
+        with self.proof_file.batch():
+            self.proof_file.delete_step(6)
+            self.proof_file.add_step(5, "\n      intros n.")
+            self.proof_file.add_step(7, "\n      Print minus.")
+            # Changes are only applied when the batch ends
+            assert self.proof_file.steps[8].text == "\n      Print Nat.add."
+        assert self.proof_file.steps_taken == steps_taken + 1
+        assert self.proof_file.steps[7].text == "\n      Print plus."
+        assert self.proof_file.steps[8].text == "\n      Print minus."
+        assert len(self.proof_file.proofs[0].steps) == 7
+
+    def test_batch_flush(self):
+        with self.proof_file.batch():
+            self.proof_file.add_step(7, "\n      Print minus.")
+            assert self.proof_file.steps[8].text == "\n      Print Nat.add."
+            # Executing steps applies the changes queued so far
+            self.proof_file.run()
+            assert self.proof_file.steps[8].text == "\n      Print minus."
+            assert len(self.proof_file.proofs[0].steps) == 7
+
+            self.proof_file.delete_step(8)
+            # Reading the proofs also applies the queued changes
+            assert len(self.proof_file.proofs[0].steps) == 6
+            self.proof_file.add_step(7, "\n      Print minus.")
+        assert self.proof_file.steps[8].text == "\n      Print minus."
+        assert len(self.proof_file.proofs[0].steps) == 7
+
+    def test_batch_add_proof(self):
+        proofs = len(self.proof_file.proofs)
+        steps_taken = self.proof_file.steps_taken
+        texts = [
+            "\nTheorem batch_steps :\n  forall n:nat,\n  0 + n = n.",
+            "\nProof.",
+            "\n  intros\n    n.",
+            "\n  reduce_eq.",
+            "\nQed.",
+        ]
+        with self.proof_file.batch():
+            for i, text in enumerate(texts):
+                self.proof_file.add_step(i + 1, text)
+        assert self.proof_file.steps_taken == steps_taken + 5
+        assert len(self.proof_file.proofs) == proofs + 1
+        assert [step.text for step in self.proof_file.steps[2:7]] == texts
+
     def test_proof_changes(self):
         unproven = self.proof_file.unproven_proofs
         assert len(unproven) == 1
@@ -329,6 +356,34 @@ class TestProofChangeInvalidFile(SetupProofFile):
             self.proof_file.change_steps([])
 
 
+# Steps added by TestProofInvalidChanges.test_invalid_add, which must fail
+_INVALID_ADDS = (
+    # File becomes invalid
+    # Add a non-existing tactic
+    (6, "\n    invalid_tactic."),
+    # Add an existing tactic that fails
+    (6, "\n    inversion 1."),
+    # Add a tactic when there are no goals
+    (7, "\n    reflexivity."),
+    # Add a tactic with undefined tokens
+    (6, "\n    invalid_tactic x $$$ y."),
+    # File remains valid but not a valid step
+    # Add two valid steps
+    (6, "\n    Check A.x. Check A.x."),
+    # Modify the previous step
+    (6, "x."),
+    # Modify the next step
+    (6, " try"),
+    # TODO: Handle this case. Should this be allowed or not?
+    # Modify existing steps and add a new one
+    # (6, "x. Check A.x. try"),
+    # Add whitespaces to end of file
+    (8, "\n \t"),
+    # Add comment to end of file
+    (8, "\n(* I'm useless *)"),
+)
+
+
 class TestProofInvalidChanges(SetupProofFile):
     def setup_method(self, method):
         self.setup("test_invalid_changes.v")
@@ -338,77 +393,34 @@ class TestProofInvalidChanges(SetupProofFile):
         self.open_steps = [len(proof.steps) for proof in self.proof_file.open_proofs]
         self.closed_steps = [len(proof.steps) for proof in self.proof_file.proofs]
         self.diagnostics = self.proof_file.diagnostics
-        with open(self.proof_file.path, "r") as f:
-            self.text = f.read()
-        self.goals = []
-        for proof in self.proof_file.proofs:
-            for step in proof.steps:
-                self.goals.append(step.goals)
+        self.text = self.proof_file.text
+        self.goals = self.__goals()
         self.proof_file.run()
 
+    def __goals(self):
+        return [step.goals for proof in self.proof_file.proofs for step in proof.steps]
+
     def __check_rollback(self):
         assert self.n_steps == len(self.proof_file.steps)
         assert self.open_proofs == len(self.proof_file.open_proofs)
         assert self.closed_proofs == len(self.proof_file.proofs)
-        for i in range(len(self.open_steps)):
-            assert self.open_steps[i] == len(self.proof_file.open_proofs[i].steps)
-        for i in range(len(self.closed_steps)):
-            assert self.closed_steps[i] == len(self.proof_file.proofs[i].steps)
+        assert self.open_steps == [
+            len(proof.steps) for proof in self.proof_file.open_proofs
+        ]
+        assert self.closed_steps == [
+            len(proof.steps) for proof in self.proof_file.proofs
+        ]
         assert self.proof_file.is_valid
         assert len(self.proof_file.diagnostics) == len(self.diagnostics)
-        with open(self.proof_file.path, "r") as f:
-            assert self.text == f.read()
-        i = 0
-        for proof in self.proof_file.proofs:
-            for step in proof.steps:
-                assert repr(step.goals) == repr(self.goals[i])
-                i += 1
+        assert self.text == self.proof_file.text
+        assert self.__goals() == self.goals
 
     def test_invalid_add(self):
-        # File becomes invalid
-        with pytest.raises(InvalidAddException):
-            # Add a non-existing tactic
-            self.proof_file.add_step(6, "\n    invalid_tactic.")
-        self.__check_rollback()
-        with pytest.raises(InvalidAddException):
-            # Add an existing tactic that fails
-            self.proof_file.add_step(6, "\n    inversion 1.")
-        self.__check_rollback()
-        with pytest.raises(InvalidAddException):
-            # Add a tactic when there are no goals
-            self.proof_file.add_step(7, "\n    reflexivity.")
-        self.__check_rollback()
-        with pytest.raises(InvalidAddException):
-            # Add a tactic with undefined tokens
-            self.proof_file.add_step(6, "\n    invalid_tactic x $$$ y.")
-        self.__check_rollback()
-
-        # File remains valid but not a valid step
-        with pytest.raises(InvalidAddException):
-            # Add two valid steps
-            self.proof_file.add_step(6, "\n    Check A.x. Check A.x.")
-        self.__check_rollback()
-        with pytest.raises(InvalidAddException):
-            # Modify the previous step
-            self.proof_file.add_step(6, "x.")
-        self.__check_rollback()
-        with pytest.raises(InvalidAddException):
-            # Modify the next step
-            self.proof_file.add_step(6, " try")
-        self.__check_rollback()
-        # TODO: Handle this case. Should this be allowed or not?
-        # with pytest.raises(InvalidAddException):
-        #     # Modify existing steps and add a new one
-        #     self.proof_file.add_step(6, "x. Check A.x. try")
-        #     self.__check_rollback()
-        with pytest.raises(InvalidAddException):
-            # Add whitespaces to end of file
-            self.proof_file.add_step(8, "\n \t")
-        self.__check_rollback()
-        with pytest.raises(InvalidAddException):
-            # Add comment to end of file
-            self.proof_file.add_step(8, "\n(* I'm useless *)")
-        self.__check_rollback()
+        # The cases share a single ProofFile, since each one is rolled back
+        for previous_step_index, step_text in _INVALID_ADDS:
+            with pytest.raises(InvalidAddException):
+                self.proof_file.add_step(previous_step_index, step_text)
+            self.__check_rollback()
 
     def test_invalid_delete(self):
         with pytest.raises(InvalidDeleteException):
@@ -426,6 +438,14 @@ class TestProofInvalidChanges(SetupProofFile):
             self.proof_file.change_steps([CoqDelete(6) for _ in range(2)])
         self.__check_rollback()
 
+    def test_invalid_batch(self):
+        with pytest.raises(InvalidChangeException):
+            with self.proof_file.batch():
+                # Delete proof body
+                self.proof_file.delete_step(6)
+                self.proof_file.delete_step(6)
+        self.__check_rollback()
+
 
 class TestProofChangeEmptyProof(SetupProofFile):
     def setup_method(self, method):
@@ -515,6 +535,22 @@ class TestProofChangeEmptyProof(SetupProofFile):
         assert len(proof_file.proofs) == 0
         assert len(proof_file.open_proofs) == 0
 
+    def test_batch_change_empty_proof(self):
+        proof_file = self.proof_file
+        texts = [" Check\nplus.", "\nreflexivity.", " Print\nplus."]
+        with proof_file.batch():
+            for i, text in enumerate(texts):
+                proof_file.add_step(i + 1, text)
+        steps = proof_file.open_proofs[0].steps
+        assert [step.text for step in steps] == ["\nProof."] + texts
+
+        with proof_file.batch():
+            # Delete [Check plus.], then [reflexivity.] which takes its index
+            proof_file.delete_step(2)
+            proof_file.delete_step(2)
+        steps = proof_file.open_proofs[0].steps
+        assert [step.text for step in steps] == ["\nProof.", texts[2]]
+
 
 class TestProofChangeNestedProofs(SetupProofFile):
     def setup_method(self, method):
@@ -14,7 +14,7 @@ class TestProofValidFile(SetupProofFile):
     def test_valid_file(self):
         proofs = self.proof_file.proofs
         check_proofs(
-            "tests/proof_file/expected/valid_file.yml",
+            "valid_file.yml",
             proofs,
             coq_version=self.coq_version,
         )
@@ -45,7 +45,7 @@ class TestProofImports(SetupProofFile):
 
     def test_imports(self):
         check_proofs(
-            "tests/proof_file/expected/imports.yml",
+            "imports.yml",
             self.proof_file.proofs,
             coq_version=self.coq_version,
         )
@@ -103,9 +103,7 @@ class TestProofListNotation(SetupProofFile):
     # FIXME: Refer to issue #24: https://github.com/sr-lab/coqpyt/issues/24
     @pytest.mark.skip(reason="Skipping due to non-deterministic behaviour")
     def test_list_notation(self):
-        check_proofs(
-            "tests/proof_file/expected/list_notation.yml", self.proof_file.proofs
-        )
+        check_proofs("list_notation.yml", self.proof_file.proofs)
 
 
 class TestProofUnknownNotation(SetupProofFile):
@@ -152,9 +150,7 @@ class TestProofNestedProofs(SetupProofFile):
         assert len(proofs) == 2
 
         steps = ["\n    intros n.", "\n    simpl; reflexivity.", "\n    Qed."]
-        assert len(proofs[0].steps) == len(steps)
-        for i, step in enumerate(proofs[0].steps):
-            assert step.text == steps[i]
+        assert [step.text for step in proofs[0].steps] == steps
 
         theorem = "Theorem mult_0_plus : forall n m : nat, S n * m = 0 + (S n * m)."
         steps = [
@@ -165,9 +161,7 @@ class TestProofNestedProofs(SetupProofFile):
             "\nQed.",
         ]
         assert proofs[1].text == theorem
-        assert len(proofs[1].steps) == len(steps)
-        for i, step in enumerate(proofs[1].steps):
-            assert step.text == steps[i]
+        assert [step.text for step in proofs[1].steps] == steps
 
         proofs = proof_file.open_proofs
         assert len(proofs) == 2
@@ -176,17 +170,8 @@ class TestProofNestedProofs(SetupProofFile):
             "\n    intros n.",
             "\n    simpl; reflexivity.",
         ]
-        assert len(proofs[0].steps) == 2
-        for i, step in enumerate(proofs[0].steps):
-            assert step.text == steps[i]
-
-        steps = [
-            "\n    intros n.",
-            "\n    simpl; reflexivity.",
-        ]
-        assert len(proofs[1].steps) == 2
-        for i, step in enumerate(proofs[1].steps):
-            assert step.text == steps[i]
+        assert [step.text for step in proofs[0].steps] == steps
+        assert [step.text for step in proofs[1].steps] == steps
 
 
 class TestProofTheoremTokens(SetupProofFile):
@@ -224,9 +209,74 @@ class TestProofBullets(SetupProofFile):
             " reflexivity.",
             "\nQed.",
         ]
-        assert len(proofs[0].steps) == len(steps)
-        for i, step in enumerate(proofs[0].steps):
-            assert step.text == steps[i]
+        assert [step.text for step in proofs[0].steps] == steps
+
+
+# Expected values are built once, when the module is imported
+_OBLIGATION_CONTEXT = (
+    (
+        "Inductive nat : Set := | O : nat | S : nat -> nat.",
+        TermType.INDUCTIVE,
+        [],
+    ),
+    ("Notation dec := sumbool_of_bool.", TermType.NOTATION, []),
+    (
+        "Fixpoint leb n m : bool := match n, m with | 0, _ => true | _, 0 => false | S n', S m' => leb n' m' end.",
+        TermType.FIXPOINT,
+        [],
+    ),
+    ("Notation pred := Nat.pred (only parsing).", TermType.NOTATION, []),
+    (
+        'Notation "{ x : A | P }" := (sig (A:=A) (fun x => P)) : type_scope.',
+        TermType.NOTATION,
+        [],
+    ),
+    ('Notation "x = y" := (eq x y) : type_scope.', TermType.NOTATION, []),
+)
+_OBLIGATION_TEXTS = (
+    "Obligation 2 of id2.",
+    "Next Obligation of id2.",
+    "Obligation 2 of id3 : type with reflexivity.",
+    "Next Obligation of id3 with reflexivity.",
+    "Next Obligation.",
+    "Next Obligation with reflexivity.",
+    "Obligation 1.",
+    "Obligation 2 : type with reflexivity.",
+    "Obligation 1 of id with reflexivity.",
+    "Obligation 1 of id : type.",
+    "Obligation 2 : type.",
+)
+_OBLIGATION_PROGRAMS = (
+    ("#[global, program]", "id2", "S (pred n)"),
+    ("#[global, program]", "id2", "S (pred n)"),
+    ("Local Program", "id3", "S (pred n)"),
+    ("Local Program", "id3", "S (pred n)"),
+    ("#[local, program]", "id1", "S (pred n)"),
+    ("#[local, program]", "id1", "S (pred n)"),
+    ("Global Program", "id4", "S (pred n)"),
+    ("Global Program", "id4", "S (pred n)"),
+    ("#[program]", "id", "pred (S n)"),
+    ("Program", "id", "S (pred n)"),
+    ("Program", "id", "S (pred n)"),
+)
+
+_PROGRAM_PROOF_CONTEXT = (
+    (
+        "Inductive nat : Set := | O : nat | S : nat -> nat.",
+        TermType.INDUCTIVE,
+        [],
+    ),
+    ('Notation "x = y" := (eq x y) : type_scope.', TermType.NOTATION, []),
+    (
+        "Program Definition id (n : nat) : { x : nat | x = n } := if dec (Nat.leb n 0) then 0%nat else S (pred n).",
+        TermType.DEFINITION,
+        ["Out"],
+    ),
+)
+_PROGRAM_PROOF_TEXTS = (
+    "Program Lemma id_lemma (n : nat) : id n = n.",
+    "Program Theorem id_theorem (n : nat) : id n = n.",
+)
 
 
 class TestProofObligation(SetupProofFile):
@@ -242,90 +292,28 @@ class TestProofObligation(SetupProofFile):
         proofs = self.proof_file.proofs
         assert len(proofs) == 13
 
-        statement_context = [
-            (
-                "Inductive nat : Set := | O : nat | S : nat -> nat.",
-                TermType.INDUCTIVE,
-                [],
-            ),
-            ("Notation dec := sumbool_of_bool.", TermType.NOTATION, []),
-            (
-                "Fixpoint leb n m : bool := match n, m with | 0, _ => true | _, 0 => false | S n', S m' => leb n' m' end.",
-                TermType.FIXPOINT,
-                [],
-            ),
-            ("Notation pred := Nat.pred (only parsing).", TermType.NOTATION, []),
-            (
-                'Notation "{ x : A | P }" := (sig (A:=A) (fun x => P)) : type_scope.',
-                TermType.NOTATION,
-                [],
-            ),
-            ('Notation "x = y" := (eq x y) : type_scope.', TermType.NOTATION, []),
-        ]
-        texts = [
-            "Obligation 2 of id2.",
-            "Next Obligation of id2.",
-            "Obligation 2 of id3 : type with reflexivity.",
-            "Next Obligation of id3 with reflexivity.",
-            "Next Obligation.",
-            "Next Obligation with reflexivity.",
-            "Obligation 1.",
-            "Obligation 2 : type with reflexivity.",
-            "Obligation 1 of id with reflexivity.",
-            "Obligation 1 of id : type.",
-            "Obligation 2 : type.",
-        ]
-        programs = [
-            ("#[global, program]", "id2", "S (pred n)"),
-            ("#[global, program]", "id2", "S (pred n)"),
-            ("Local Program", "id3", "S (pred n)"),
-            ("Local Program", "id3", "S (pred n)"),
-            ("#[local, program]", "id1", "S (pred n)"),
-            ("#[local, program]", "id1", "S (pred n)"),
-            ("Global Program", "id4", "S (pred n)"),
-            ("Global Program", "id4", "S (pred n)"),
-            ("#[program]", "id", "pred (S n)"),
-            ("Program", "id", "S (pred n)"),
-            ("Program", "id", "S (pred n)"),
-        ]
-
         obligations = proofs[:8] + proofs[-3:]
-        for i, proof in enumerate(obligations):
-            compare_context(statement_context, proof.context)
-            assert proof.text == texts[i]
+        for proof, text, (attrs, name, body) in zip(
+            obligations, _OBLIGATION_TEXTS, _OBLIGATION_PROGRAMS
+        ):
+            compare_context(_OBLIGATION_CONTEXT, proof.context)
+            assert proof.text == text
             assert proof.program is not None
             assert (
                 proof.program.text
-                == programs[i][0]
+                == attrs
                 + " Definition "
-                + programs[i][1]
+                + name
                 + " (n : nat) : { x : nat | x = n } := if dec (Nat.leb n 0) then 0%nat else "
-                + programs[i][2]
+                + body
                 + "."
             )
             assert len(proof.steps) == 2
             assert proof.steps[0].text == "\n  dummy_tactic n e."
 
-        statement_context = [
-            (
-                "Inductive nat : Set := | O : nat | S : nat -> nat.",
-                TermType.INDUCTIVE,
-                [],
-            ),
-            ('Notation "x = y" := (eq x y) : type_scope.', TermType.NOTATION, []),
-            (
-                "Program Definition id (n : nat) : { x : nat | x = n } := if dec (Nat.leb n 0) then 0%nat else S (pred n).",
-                TermType.DEFINITION,
-                ["Out"],
-            ),
-        ]
-        texts = [
-            "Program Lemma id_lemma (n : nat) : id n = n.",
-            "Program Theorem id_theorem (n : nat) : id n = n.",
-        ]
-        for i, proof in enumerate(proofs[8:-3]):
-            compare_context(statement_context, proof.context)
-            assert proof.text == texts[i]
+        for proof, text in zip(proofs[8:-3], _PROGRAM_PROOF_TEXTS):
+            compare_context(_PROGRAM_PROOF_CONTEXT, proof.context)
+            assert proof.text == text
             assert proof.program is None
             assert len(proof.steps) == 3
             assert proof.steps[1].text == " destruct n; try reflexivity."
@@ -346,11 +334,11 @@ class TestProofTypeClass(SetupProofFile):
         self.setup("test_type_class.v")
 
     def test_type_class(self):
-        proof_file = self.proof_file
-        assert len(proof_file.proofs) == 2
-        assert len(proof_file.proofs[0].steps) == 4
+        proofs = self.proof_file.proofs
+        assert len(proofs) == 2
+        assert len(proofs[0].steps) == 4
         assert (
-            proof_file.proofs[0].text
+            proofs[0].text
             == "#[refine] Global Instance unit_EqDec : TypeClass.EqDecNew unit := { eqb_new x y := true }."
         )
 
@@ -367,10 +355,10 @@ class TestProofTypeClass(SetupProofFile):
                 [],
             ),
         ]
-        compare_context(context, proof_file.proofs[0].context)
+        compare_context(context, proofs[0].context)
 
         assert (
-            proof_file.proofs[1].text
+            proofs[1].text
             == "Instance test : TypeClass.EqDecNew unit -> TypeClass.EqDecNew unit."
         )
 
@@ -387,7 +375,7 @@ class TestProofTypeClass(SetupProofFile):
             ),
             ("Inductive unit : Set := tt : unit.", TermType.INDUCTIVE, []),
         ]
-        compare_context(context, proof_file.proofs[1].context)
+        compare_context(context, proofs[1].context)
 
 
 class TestProofGoal(SetupProofFile):
@@ -395,14 +383,15 @@ class TestProofGoal(SetupProofFile):
         self.setup("test_goal.v")
 
     def test_goal(self):
-        assert len(self.proof_file.proofs) == 3
+        proofs = self.proof_file.proofs
+        assert len(proofs) == 3
         goals = [
             "Definition ignored : forall P Q: Prop, (P -> Q) -> P -> Q.",
             "Goal forall P Q: Prop, (P -> Q) -> P -> Q.",
             "Goal forall P Q: Prop, (P -> Q) -> P -> Q.",
         ]
-        for i, proof in enumerate(self.proof_file.proofs):
-            assert proof.text == goals[i]
+        for proof, goal in zip(proofs, goals):
+            assert proof.text == goal
             compare_context(
                 [
                     (
@@ -420,20 +409,21 @@ class TestProofCmd(SetupProofFile):
         self.setup("test_proof_cmd.v")
 
     def test_proof_cmd(self):
-        assert len(self.proof_file.proofs) == 3
+        proofs = self.proof_file.proofs
+        assert len(proofs) == 3
         goals = [
             "Goal ∃ (m : nat), S m = n.",
             "Goal ∃ (m : nat), S m = n.",
             "Goal nat.",
         ]
-        proofs = [
+        steps = [
             "\n  Proof using Hn.",
             "\n  Proof with auto.",
             "\n  Proof 0.",
         ]
-        for i, proof in enumerate(self.proof_file.proofs):
-            assert proof.text == goals[i]
-            assert proof.steps[0].text == proofs[i]
+        for proof, goal, step in zip(proofs, goals, steps):
+            assert proof.text == goal
+            assert proof.steps[0].text == step
 
 
 class TestProofSection(SetupProofFile):
@@ -441,8 +431,9 @@ class TestProofSection(SetupProofFile):
         self.setup("test_section_terms.v")
 
     def test_section(self):
-        assert len(self.proof_file.proofs) == 1
-        assert self.proof_file.proofs[0].text == "Let ignored : nat."
+        proofs = self.proof_file.proofs
+        assert len(proofs) == 1
+        assert proofs[0].text == "Let ignored : nat."
         assert len(self.proof_file.context.local_terms) == 0
 
 
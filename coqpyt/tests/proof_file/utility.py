@@ -1,5 +1,6 @@
 import os
 import re
+import atexit
 import shutil
 import subprocess
 import tempfile
@@ -7,6 +8,10 @@ import uuid
 import yaml
 
 from abc import ABC, abstractmethod
+from copy import deepcopy
+from functools import lru_cache
+from operator import attrgetter
+from pathlib import Path
 from typing import Tuple, List, Dict, Union, Any
 
 from coqpyt.coq.proof_file import ProofFile, ProofStep, ProofTerm
@@ -14,25 +19,54 @@ from coqpyt.coq.structs import TermType, Term
 from coqpyt.coq.lsp.structs import *
 
 
+RESOURCES = Path(__file__).parent.parent / "resources"
+# Expected proofs, which are given to get_test_proofs by file name
+EXPECTED = Path(__file__).parent / "expected"
+
+# Workspaces already compiled in this session, indexed by their resource path
+_built_workspaces: Dict[str, str] = {}
+
+
+def _temp_path(suffix: str = "") -> str:
+    return os.path.join(
+        tempfile.gettempdir(), "test" + str(uuid.uuid4()).replace("-", "") + suffix
+    )
+
+
+def _build_workspace(workspace: str) -> str:
+    # Each workspace is compiled once per session. Tests get a copy of the
+    # compiled workspace, so that they can change its files.
+    if workspace not in _built_workspaces:
+        build = _temp_path()
+        shutil.copytree(RESOURCES / workspace, build)
+        subprocess.run(
+            ["make"],
+            cwd=build,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        atexit.register(shutil.rmtree, build, ignore_errors=True)
+        _built_workspaces[workspace] = build
+    return _built_workspaces[workspace]
+
+
+@lru_cache(maxsize=None)
+def _coq_version() -> str:
+    output = subprocess.check_output(["coqtop", "-v"])
+    return output.decode("utf-8").split("\n")[0].split()[-1]
+
+
 class SetupProofFile(ABC):
     def setup(self, file_path, workspace=None, use_disk_cache: bool = False):
         if workspace is not None:
-            self.workspace = os.path.join(
-                tempfile.gettempdir(), "test" + str(uuid.uuid4()).replace("-", "")
-            )
-            shutil.copytree(os.path.join("tests/resources", workspace), self.workspace)
-            run = subprocess.run(
-                f"cd {self.workspace} && make", shell=True, capture_output=True
-            )
-            assert run.returncode == 0
+            self.workspace = _temp_path()
+            shutil.copytree(_build_workspace(workspace), self.workspace)
             self.file_path = os.path.join(self.workspace, os.path.basename(file_path))
         else:
             self.workspace = None
-            new_path = os.path.join(
-                tempfile.gettempdir(),
-                "test" + str(uuid.uuid4()).replace("-", "") + ".v",
-            )
-            shutil.copyfile(os.path.join("tests/resources", file_path), new_path)
+            new_path = _temp_path(".v")
+            shutil.copyfile(RESOURCES / file_path, new_path)
             self.file_path = new_path
 
         uri = "file://" + self.file_path
@@ -44,31 +78,26 @@ class SetupProofFile(ABC):
         )
         self.proof_file.run()
         self.versionId = VersionedTextDocumentIdentifier(uri, 1)
-
-        output = subprocess.check_output(f"coqtop -v", shell=True)
-        self.coq_version = output.decode("utf-8").split("\n")[0].split()[-1]
+        self.coq_version = _coq_version()
 
     @abstractmethod
     def setup_method(self, method):
         pass
 
     def teardown_method(self, method):
-        if self.workspace is not None:
-            subprocess.run(
-                f"cd {self.workspace} && make clean", shell=True, capture_output=True
-            )
         self.proof_file.close()
         os.remove(self.file_path)
+        if self.workspace is not None:
+            shutil.rmtree(self.workspace)
+
+
+_term_fields = attrgetter("text", "type", "module")
 
 
 def compare_context(
     test_context: List[Tuple[str, TermType, List[str]]], context: List[Term]
 ):
-    assert len(test_context) == len(context)
-    for i in range(len(context)):
-        assert test_context[i][0] == context[i].text
-        assert test_context[i][1] == context[i].type
-        assert test_context[i][2] == context[i].module
+    assert list(test_context) == list(map(_term_fields, context))
 
 
 def check_context(test_context: List[Dict[str, Union[str, List]]], context: List[Term]):
@@ -81,64 +110,68 @@ def check_context(test_context: List[Dict[str, Union[str, List]]], context: List
         assert test_context[i]["module"] == context[i].module
 
 
-def check_goal(test_goal: Dict, goal: Goal):
-    assert test_goal["ty"] == goal.ty
-    assert len(test_goal["hyps"]) == len(goal.hyps)
-    for j in range(len(goal.hyps)):
-        assert test_goal["hyps"][j]["ty"] == goal.hyps[j].ty
-        assert len(test_goal["hyps"][j]["names"]) == len(goal.hyps[j].names)
-        for k in range(len(goal.hyps[j].names)):
-            assert test_goal["hyps"][j]["names"][k] == goal.hyps[j].names[k]
+def _goal_fields(goal: Goal) -> Tuple:
+    return (goal.ty, [(hyp.names, hyp.ty) for hyp in goal.hyps])
 
 
-def check_step(test_step: Dict[str, Any], step: ProofStep):
-    assert test_step["text"] == step.text
-    goals = test_step["goals"]
+def _test_goal_fields(test_goal: Dict) -> Tuple:
+    return (
+        test_goal["ty"],
+        [(tuple(hyp["names"]), hyp["ty"]) for hyp in test_goal["hyps"]],
+    )
 
-    assert goals["position"]["line"] == step.goals.position.line
-    assert goals["position"]["character"] == step.goals.position.character
-    assert len(goals["messages"]) == len(step.goals.messages)
-    for i in range(len(step.goals.messages)):
-        assert goals["messages"][i] == step.goals.messages[i].text
-
-    assert len(goals["goals"]["goals"]) == len(step.goals.goals.goals)
-    for i in range(len(step.goals.goals.goals)):
-        check_goal(goals["goals"]["goals"][i], step.goals.goals.goals[i])
-
-    # Check stack
-    assert len(goals["goals"]["stack"]) == len(step.goals.goals.stack)
-    for i in range(len(step.goals.goals.stack)):
-        assert len(goals["goals"]["stack"][i][0]) == len(step.goals.goals.stack[i][0])
-        for j in range(len(step.goals.goals.stack[i][0])):
-            check_goal(
-                goals["goals"]["stack"][i][0][j], step.goals.goals.stack[i][0][j]
-            )
 
-        assert len(goals["goals"]["stack"][i][1]) == len(step.goals.goals.stack[i][1])
-        for j in range(len(step.goals.goals.stack[i][1])):
-            check_goal(
-                goals["goals"]["stack"][i][1][j], step.goals.goals.stack[i][1][j]
-            )
+def _step_fields(step: ProofStep) -> Tuple:
+    goals = step.goals.goals
+    return (
+        step.text,
+        (step.goals.position.line, step.goals.position.character),
+        [message.text for message in step.goals.messages],
+        list(map(_goal_fields, goals.goals)),
+        [
+            (list(map(_goal_fields, left)), list(map(_goal_fields, right)))
+            for left, right in goals.stack
+        ],
+        list(map(_goal_fields, goals.shelf)),
+        list(map(_goal_fields, goals.given_up)),
+    )
 
-    # Check shelf
-    assert len(goals["goals"]["shelf"]) == len(step.goals.goals.shelf)
-    for i in range(len(step.goals.goals.shelf)):
-        check_goal(goals["goals"]["shelf"][i], step.goals.goals.shelf[i])
 
-    # Check given_up
-    assert len(goals["goals"]["given_up"]) == len(step.goals.goals.given_up)
-    for i in range(len(step.goals.goals.given_up)):
-        check_goal(goals["goals"]["given_up"][i], step.goals.goals.given_up[i])
+def _test_step_fields(test_step: Dict[str, Any]) -> Tuple:
+    goals = test_step["goals"]
+    position = goals["position"]
+    return (
+        test_step["text"],
+        (position["line"], position["character"]),
+        goals["messages"],
+        list(map(_test_goal_fields, goals["goals"]["goals"])),
+        [
+            (list(map(_test_goal_fields, left)), list(map(_test_goal_fields, right)))
+            for left, right in goals["goals"]["stack"]
+        ],
+        list(map(_test_goal_fields, goals["goals"]["shelf"])),
+        list(map(_test_goal_fields, goals["goals"]["given_up"])),
+    )
+
+
+def _range_fields(step_range: Range) -> Tuple[int, int, int, int]:
+    return (
+        step_range.start.line,
+        step_range.start.character,
+        step_range.end.line,
+        step_range.end.character,
+    )
 
+
+def check_step(test_step: Dict[str, Any], step: ProofStep):
+    # Each step is checked with a single comparison of its normalized fields
+    assert _test_step_fields(test_step) == _step_fields(step)
     check_context(test_step["context"], step.context)
 
     if "range" in test_step:
-        test_range = test_step["range"]
-        step_range = step.ast.range
-        assert test_range["start"]["line"] == step_range.start.line
-        assert test_range["start"]["character"] == step_range.start.character
-        assert test_range["end"]["line"] == step_range.end.line
-        assert test_range["end"]["character"] == step_range.end.character
+        start, end = test_step["range"]["start"], test_step["range"]["end"]
+        test_range = (start["line"], start["character"], end["line"], end["character"])
+        assert test_range == _range_fields(step.ast.range)
 
 
 def check_proof(test_proof: Dict, proof: ProofTerm):
@@ -160,6 +193,11 @@ def check_proofs(
         check_proof(test_proof, proofs[i])
 
 
+def shift_lines(steps: List[Dict], delta: int):
+    for step in steps:
+        step["goals"]["position"]["line"] += delta
+
+
 def add_step_defaults(step):
     if "goals" not in step:
         step["goals"] = {}
@@ -193,9 +231,19 @@ def get_context_by_version(context: List[Dict[str, Any]], coq_version: str):
     return res
 
 
+# Use the libyaml bindings when PyYAML was built with them
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@lru_cache(maxsize=32)
+def _load_test_proofs(yaml_file: str):
+    with open(EXPECTED / yaml_file, "rb") as f:
+        return yaml.load(f, Loader=_YamlLoader)
+
+
 def get_test_proofs(yaml_file: str, coq_version: Optional[str] = None):
-    with open(yaml_file, "r") as f:
-        test_proofs = yaml.safe_load(f)
+    # The tests change the returned proofs, so the cached ones are copied
+    test_proofs = deepcopy(_load_test_proofs(yaml_file))
     for test_proof in test_proofs["proofs"]:
         if "context" not in test_proof:
             test_proof["context"] = []
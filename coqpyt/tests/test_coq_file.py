@@ -3,41 +3,73 @@ import uuid
 import shutil
 import pytest
 import tempfile
+from pathlib import Path
+from typing import List
 
 from coqpyt.coq.exceptions import *
 from coqpyt.coq.changes import *
 from coqpyt.coq.base_file import CoqFile
-
-coq_file: CoqFile = None
+from coqpyt.coq.lsp.structs import Position, Range, RangedSpan
+from coqpyt.coq.structs import Step
+
+# Only test_apply_changes runs without coq-lsp
+requires_coq_lsp = pytest.mark.skipif(
+    shutil.which("coq-lsp") is None, reason="coq-lsp is not installed"
+)
+
+RESOURCES = Path(__file__).parent / "resources"
+
+
+# Resource file opened by the coq_file fixture for each test
+_TEST_FILES = {
+    "test_is_valid": "test_valid.v",
+    "test_negative_step": "test_valid.v",
+    "test_delete_step": "test_valid.v",
+    "test_add_step": "test_valid.v",
+    "test_add_definition": "test_valid.v",
+    "test_change_steps": "test_valid.v",
+    "test_add_proof": "test_valid.v",
+    "test_delete_proof": "test_valid.v",
+    "test_where_notation": "test_where_notation.v",
+    "test_get_notation": "test_get_notation.v",
+    "test_is_invalid_1": "test_invalid_1.v",
+    "test_is_invalid_2": "test_invalid_2.v",
+    "test_module_type": "test_module_type.v",
+    "test_derive": "test_derive.v",
+    "test_equations": "test_equations.v",
+    "test_diagnostics": "test_simple_file.v",
+    "test_diagnostics_invalid": "test_invalid_1.v",
+}
+
+
+def pytest_generate_tests(metafunc):
+    if "coq_file" in metafunc.fixturenames:
+        test_file = _TEST_FILES[metafunc.function.__name__]
+        metafunc.parametrize(
+            "coq_file", [pytest.param(test_file, marks=requires_coq_lsp)], indirect=True
+        )
 
 
 @pytest.fixture
-def setup(request):
-    global coq_file
-    file_path = os.path.join("tests/resources", request.param)
+def coq_file(request):
+    # Each test gets its own file, so tests do not share any state
+    file_path = RESOURCES / request.param
     new_file_path = os.path.join(
         tempfile.gettempdir(),
         "test" + str(uuid.uuid4()).replace("-", "") + ".v",
     )
     shutil.copyfile(file_path, new_file_path)
     coq_file = CoqFile(new_file_path, timeout=60)
-    yield
-
-
-@pytest.fixture
-def teardown():
-    yield
+    yield coq_file
     coq_file.close()
     os.remove(coq_file.path)
 
 
-@pytest.mark.parametrize("setup", ["test_valid.v"], indirect=True)
-def test_is_valid(setup, teardown):
+def test_is_valid(coq_file):
     assert coq_file.is_valid
 
 
-@pytest.mark.parametrize("setup", ["test_valid.v"], indirect=True)
-def test_negative_step(setup, teardown):
+def test_negative_step(coq_file):
     steps = coq_file.exec(nsteps=8)
     assert steps[-1].text == "\n      Print plus."
     steps = coq_file.exec(nsteps=-1)
@@ -54,8 +86,7 @@ def test_negative_step(setup, teardown):
     assert coq_file.context.curr_modules == ["Out"]
 
 
-@pytest.mark.parametrize("setup", ["test_valid.v"], indirect=True)
-def test_delete_step(setup, teardown):
+def test_delete_step(coq_file):
     assert coq_file.steps[8].text == "\n      Print Nat.add."
     assert coq_file.steps[8].ast.range.start.line == 12
 
@@ -69,12 +100,10 @@ def test_delete_step(setup, teardown):
     steps = coq_file.exec(nsteps=1)
     assert steps[-1].text == "\n    Qed."
 
-    with open(coq_file.path, "r") as f:
-        assert "Print plus." not in f.read()
+    assert "Print plus." not in coq_file.text
 
 
-@pytest.mark.parametrize("setup", ["test_valid.v"], indirect=True)
-def test_add_step(setup, teardown):
+def test_add_step(coq_file):
     assert coq_file.steps[8].text == "\n      Print Nat.add."
     assert coq_file.steps[8].ast.range.start.line == 12
 
@@ -95,8 +124,7 @@ def test_add_step(setup, teardown):
     assert steps[-1].ast.range.start.line == 14
 
 
-@pytest.mark.parametrize("setup", ["test_valid.v"], indirect=True)
-def test_add_definition(setup, teardown):
+def test_add_definition(coq_file):
     coq_file.exec(5)
     steps_taken = coq_file.steps_taken
 
@@ -107,8 +135,7 @@ def test_add_definition(setup, teardown):
     assert coq_file.steps_taken == steps_taken + 1
 
 
-@pytest.mark.parametrize("setup", ["test_valid.v"], indirect=True)
-def test_change_steps(setup, teardown):
+def test_change_steps(coq_file):
     assert coq_file.steps[8].text == "\n      Print Nat.add."
     assert coq_file.steps[8].ast.range.start.line == 12
 
@@ -137,8 +164,7 @@ def test_change_steps(setup, teardown):
         )
 
 
-@pytest.mark.parametrize("setup", ["test_valid.v"], indirect=True)
-def test_add_proof(setup, teardown):
+def test_add_proof(coq_file):
     coq_file.run()
     steps_taken = coq_file.steps_taken
     assert "change_steps" not in coq_file.context.terms
@@ -164,8 +190,7 @@ def test_add_proof(setup, teardown):
     assert coq_file.steps_taken == steps_taken + 5
 
 
-@pytest.mark.parametrize("setup", ["test_valid.v"], indirect=True)
-def test_delete_proof(setup, teardown):
+def test_delete_proof(coq_file):
     # Test if mult_0_plus is removed
     # It also tests if deletion with invalid intermediate states works
     coq_file.run()
@@ -176,8 +201,7 @@ def test_delete_proof(setup, teardown):
     assert coq_file.steps_taken == steps_taken - 7
 
 
-@pytest.mark.parametrize("setup", ["test_where_notation.v"], indirect=True)
-def test_where_notation(setup, teardown):
+def test_where_notation(coq_file):
     coq_file.run()
     assert "n + m : test_scope" in coq_file.context.terms
     assert (
@@ -206,8 +230,7 @@ def test_where_notation(setup, teardown):
     )
 
 
-@pytest.mark.parametrize("setup", ["test_get_notation.v"], indirect=True)
-def test_get_notation(setup, teardown):
+def test_get_notation(coq_file):
     coq_file.run()
     assert (
         coq_file.context.get_notation("'_' _ '_' _ '_'", "test_scope").text
@@ -223,8 +246,7 @@ def test_get_notation(setup, teardown):
     )
 
 
-@pytest.mark.parametrize("setup", ["test_invalid_1.v"], indirect=True)
-def test_is_invalid_1(setup, teardown):
+def test_is_invalid_1(coq_file):
     assert not coq_file.is_valid
     steps = coq_file.run()
     assert len(steps[11].diagnostics) == 1
@@ -235,8 +257,7 @@ def test_is_invalid_1(setup, teardown):
     assert steps[11].diagnostics[0].severity == 1
 
 
-@pytest.mark.parametrize("setup", ["test_invalid_2.v"], indirect=True)
-def test_is_invalid_2(setup, teardown):
+def test_is_invalid_2(coq_file):
     assert not coq_file.is_valid
     steps = coq_file.run()
     assert len(steps[15].diagnostics) == 1
@@ -247,8 +268,7 @@ def test_is_invalid_2(setup, teardown):
     assert steps[15].diagnostics[0].severity == 1
 
 
-@pytest.mark.parametrize("setup", ["test_module_type.v"], indirect=True)
-def test_module_type(setup, teardown):
+def test_module_type(coq_file):
     coq_file.run()
     # We ignore terms inside a Module Type since they can't be used outside
     # and should be overriden.
@@ -256,8 +276,7 @@ def test_module_type(setup, teardown):
     assert "plus_O_n" in coq_file.context.terms
 
 
-@pytest.mark.parametrize("setup", ["test_derive.v"], indirect=True)
-def test_derive(setup, teardown):
+def test_derive(coq_file):
     coq_file.run()
     for key in ["incr", "incr_correct"]:
         assert key in coq_file.context.terms
@@ -271,18 +290,17 @@ def test_derive(setup, teardown):
         "Dependent Inversion",
         "Dependent Inversion_clear",
     ]
-    for i in range(4):
-        key = f"leminv{i + 1}"
+    for i, keyword in enumerate(keywords, 1):
+        key = f"leminv{i}"
         assert key in coq_file.context.terms
         assert (
             coq_file.context.terms[key].text
-            == f"Derive {keywords[i]} {key} with (forall n m:nat, Le (S n) m) Sort Prop."
+            == f"Derive {keyword} {key} with (forall n m:nat, Le (S n) m) Sort Prop."
         )
 
 
 @pytest.mark.extra
-@pytest.mark.parametrize("setup", ["test_equations.v"], indirect=True)
-def test_equations(setup, teardown):
+def test_equations(coq_file):
     coq_file.run()
     assert len(coq_file.context.terms) == 0
     assert coq_file.context.last_term is not None
@@ -292,17 +310,17 @@ def test_equations(setup, teardown):
     )
 
 
+@requires_coq_lsp
 def test_space_in_path():
     # This test exists because coq-lsp encodes spaces in paths as %20
     # This causes the diagnostics to be saved in a different path than the one
     # considered by CoqPyt. This was fixed by unquoting the path given
     # by coq-lsp.
-    with CoqFile("tests/resources/test test/test_error.v") as coq_file:
+    with CoqFile(str(RESOURCES / "test test" / "test_error.v")) as coq_file:
         assert not coq_file.is_valid
 
 
-@pytest.mark.parametrize("setup", ["test_simple_file.v"], indirect=True)
-def test_diagnostics(setup, teardown):
+def test_diagnostics(coq_file):
     coq_file.run()
     assert len(coq_file.diagnostics) == 2
     assert len(coq_file.errors) == 0
@@ -315,8 +333,7 @@ def test_diagnostics(setup, teardown):
     assert len(coq_file.errors) == 0
 
 
-@pytest.mark.parametrize("setup", ["test_invalid_1.v"], indirect=True)
-def test_diagnostics_invalid(setup, teardown):
+def test_diagnostics_invalid(coq_file):
     coq_file.run()
     assert len(coq_file.diagnostics) == 7
     assert len(coq_file.errors) == 1
@@ -324,3 +341,81 @@ def test_diagnostics_invalid(setup, teardown):
         coq_file.errors[0].message
         == 'Found no subterm matching "0 + ?M152" in the current goal.'
     )
+
+
+def _make_steps(texts: List[str]) -> List[Step]:
+    # Steps with the ranges coq-lsp would give, which start after the whitespace
+    steps, line, character = [], 0, 0
+    for text in texts:
+        skipped = text[: len(text) - len(text.lstrip())]
+        if "\n" in skipped:
+            start = Position(line + skipped.count("\n"), len(skipped.split("\n")[-1]))
+        else:
+            start = Position(line, character + len(skipped))
+        if "\n" in text:
+            line += text.count("\n")
+            character = len(text.split("\n")[-1])
+        else:
+            character += len(text)
+        end = Position(line, character)
+        steps.append(Step(text, text, RangedSpan(Range(start, end), None)))
+    return steps
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        # Consecutive adds
+        [
+            CoqAdd("\nTheorem t : True.", 1),
+            CoqAdd("\nProof.", 2),
+            CoqAdd("\nQed.", 3),
+        ],
+        # Repeated deletes with the same index
+        [CoqDelete(2) for _ in range(3)],
+        # Adds and deletes of steps with several lines
+        [
+            CoqDelete(3),
+            CoqAdd("\n  b\n    with\n  c.", 2),
+            CoqDelete(2),
+            CoqAdd("\n  a. (* comment *)", 1),
+            CoqAdd("\n  d.", 4),
+            CoqDelete(5),
+        ],
+    ],
+)
+def test_apply_changes(changes):
+    texts = ["Theorem a : True.", "\nProof.", "\n  a.", "\n  b.", "\n  c.", "\nQed."]
+    # The changes are applied without coq-lsp, which is never started
+    coq_file = CoqFile.__new__(CoqFile)
+    coq_file._path = os.path.join(
+        tempfile.gettempdir(),
+        "test" + str(uuid.uuid4()).replace("-", "") + ".v",
+    )
+    with open(coq_file._path, "w") as f:
+        f.write("".join(texts) + "\n")
+    coq_file.steps = _make_steps(texts)
+
+    try:
+        coq_file._apply_changes(changes)
+        with open(coq_file._path, "r") as f:
+            text = f.read()
+    finally:
+        os.remove(coq_file._path)
+
+    for change in changes:
+        if isinstance(change, CoqAdd):
+            texts.insert(change.previous_step_index + 1, change.step_text)
+        else:
+            texts.pop(change.step_index)
+    assert text == "".join(texts) + "\n"
+    # The added steps are placeholders, so only the ends of the ranges are kept
+    ends = [
+        (step.ast.range.end.line, step.ast.range.end.character)
+        for step in coq_file.steps
+    ]
+    expected_ends = [
+        (step.ast.range.end.line, step.ast.range.end.character)
+        for step in _make_steps(texts)
+    ]
+    assert ends == expected_ends
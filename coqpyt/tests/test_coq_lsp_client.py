@@ -1,18 +1,45 @@
 import os
+import pytest
+import shutil
+from pathlib import Path
 
 from coqpyt.lsp.structs import *
 from coqpyt.coq.lsp.client import CoqLspClient
 
+if shutil.which("coq-lsp") is None:
+    pytest.skip("coq-lsp is not installed", allow_module_level=True)
+
+RESOURCES = Path(__file__).parent / "resources"
+
 
 def test_save_vo():
-    client = CoqLspClient("tests/resources")
-    file_path = f"{os.getcwd()}/tests/resources/test_valid.v"
-    uri = f"file://{os.getcwd()}/tests/resources/test_valid.v"
+    client = CoqLspClient(str(RESOURCES))
+    file_path = RESOURCES / "test_valid.v"
+    uri = f"file://{file_path}"
     with open(file_path, "r") as f:
         client.didOpen(TextDocumentItem(uri, "coq", 1, f.read()))
     versionId = TextDocumentIdentifier(uri)
     client.save_vo(versionId)
     client.shutdown()
     client.exit()
-    assert os.path.exists("tests/resources/test_valid.vo")
-    os.remove("tests/resources/test_valid.vo")
+    assert os.path.exists(RESOURCES / "test_valid.vo")
+    os.remove(RESOURCES / "test_valid.vo")
+
+
+def test_proof_goals_cache():
+    client = CoqLspClient(str(RESOURCES))
+    file_path = RESOURCES / "test_valid.v"
+    uri = f"file://{file_path}"
+    with open(file_path, "r") as f:
+        text = f.read()
+    client.didOpen(TextDocumentItem(uri, "coq", 1, text))
+    textDocument = TextDocumentIdentifier(uri)
+    goals = client.proof_goals(textDocument, Position(10, 15))
+    assert client.proof_goals(textDocument, Position(10, 15)) is goals
+    client.didChange(
+        VersionedTextDocumentIdentifier(uri, 2),
+        [TextDocumentContentChangeEvent(None, None, text)],
+    )
+    assert client.proof_goals(textDocument, Position(10, 15)) is not goals
+    client.shutdown()
+    client.exit()
@@ -93,3 +93,20 @@ def test_recv_close_pipe():
     pipeout.close()
     result = json_rpc_endpoint.recv_response()
     assert result is None
+
+
+def test_send_slots_class():
+    class RpcClass(object):
+        __slots__ = ("key_num", "key_str")
+
+        def __init__(self, value_num, value_str):
+            self.key_num = value_num
+            self.key_str = value_str
+
+    pipein, pipeout = os.pipe()
+    pipein = os.fdopen(pipein, "rb")
+    pipeout = os.fdopen(pipeout, "wb")
+    json_rpc_endpoint = lsp.JsonRpcEndpoint(pipeout, None)
+    json_rpc_endpoint.send_request(RpcClass(1, "some_string"))
+    result = pipein.read(len(JSON_RPC_RESULT_LIST[0]))
+    assert result in JSON_RPC_RESULT_LIST
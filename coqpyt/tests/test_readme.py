@@ -1,8 +1,13 @@
 import os
+import shutil
 import uuid
 import pytest
 import tempfile
 import subprocess
+from contextlib import suppress
+
+if shutil.which("coq-lsp") is None:
+    pytest.skip("coq-lsp is not installed", allow_module_level=True)
 
 temp_path = os.path.join(tempfile.gettempdir(), str(uuid.uuid4()))
 
@@ -10,7 +15,8 @@ temp_path = os.path.join(tempfile.gettempdir(), str(uuid.uuid4()))
 @pytest.fixture
 def teardown_aux():
     yield
-    if os.path.exists(temp_path):
+    # The script is not written if the test fails before
+    with suppress(FileNotFoundError):
         os.remove(temp_path)
 
 